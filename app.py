@@ -1,19 +1,106 @@
 import os
-import json
-from flask import Flask, request, jsonify, render_template, send_from_directory
+import re
+import itertools
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from functools import lru_cache
+from flask import Flask, Response, request, render_template, send_from_directory, stream_with_context
+from flask_compress import Compress
+import orjson
 import boto3
-from botocore.exceptions import ClientError, NoCredentialsError
+from botocore.config import Config
+from botocore.paginate import TokenDecoder
+from botocore.exceptions import BotoCoreError, ClientError, NoCredentialsError
+from werkzeug.http import parse_options_header
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
 from werkzeug.utils import secure_filename
 
 app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024  # 100MB max file size
 
-# Initialize S3 client
-try:
-    s3_client = boto3.client('s3')
-except NoCredentialsError:
-    print("Error: AWS credentials not found. Please configure AWS credentials via environment variables or IAM role.")
-    exit(1)
+# Listings are highly repetitive JSON and compress very well; streamed
+# responses (list_files) are gzipped chunk by chunk as they're generated
+app.config['COMPRESS_ALGORITHM'] = 'gzip'
+app.config['COMPRESS_ALGORITHM_STREAMING'] = 'gzip'
+app.config['COMPRESS_MIMETYPES'] = ['application/json', 'text/html']
+app.config['COMPRESS_MIN_SIZE'] = 1024
+Compress(app)
+
+ACL_CHOICES = ('private', 'public-read', 'public-read-write', 'authenticated-read')
+VALID_ACLS = frozenset(ACL_CHOICES)
+# Upload arguments per ACL, shared read-only across uploads. The ACL is only
+# sent when not private, since some buckets have ACLs disabled
+# (BucketOwnerEnforced)
+UPLOAD_ARGS = {
+    acl: {'ServerSideEncryption': 'AES256'} if acl == 'private'
+    else {'ServerSideEncryption': 'AES256', 'ACL': acl}
+    for acl in ACL_CHOICES
+}
+
+def is_valid_acl(acl):
+    # JSON bodies can carry lists or objects, which can't be hashed for the
+    # frozenset lookup
+    return isinstance(acl, str) and acl in VALID_ACLS
+
+_DIR_NAME_RE = re.compile(r'^[a-zA-Z0-9\-_.]+\Z')
+
+def ojsonify(payload, status=200):
+    # orjson is much faster than the stdlib encoder and handles datetimes natively
+    return app.response_class(orjson.dumps(payload), status=status, mimetype='application/json')
+
+def parse_json():
+    # Decode request bodies with orjson; cache=False lets Werkzeug drop the
+    # raw bytes once parsed. Malformed or non-object bodies yield None.
+    # Only application/json is accepted: other types can be sent cross-site
+    # without a CORS preflight, which would let any page change ACLs
+    if not request.is_json:
+        return None
+    try:
+        data = orjson.loads(request.get_data(cache=False) or b'{}')
+    except orjson.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
+
+# S3 error codes that mean the client should back off before retrying
+THROTTLE_CODES = frozenset(('SlowDown', 'ServiceUnavailable', 'Throttling', 'RequestLimitExceeded'))
+RETRY_AFTER_SECONDS = 5
+
+def _client_err(e):
+    # Only the code and message are returned; str(e) formats the whole
+    # botocore response and exposes operation names to the browser
+    err = e.response.get('Error', {})
+    return {'code': err.get('Code', 'Unknown'), 'message': err.get('Message', str(e))}
+
+def client_error_response(e):
+    error = _client_err(e)
+    status = e.response.get('ResponseMetadata', {}).get('HTTPStatusCode')
+    if error['code'] in THROTTLE_CODES or status == 503:
+        response = ojsonify({'success': False, 'error': error}, 503)
+        response.headers['Retry-After'] = str(RETRY_AFTER_SECONDS)
+        return response
+    return ojsonify({'success': False, 'error': error}, 500)
+
+# Concurrent requests per gevent worker; gunicorn.conf.py reads the same
+# variable for worker_connections
+WORKER_CONNECTIONS = int(os.environ.get('WORKER_CONNECTIONS', '200'))
+
+# One client is shared by all request greenlets and pool threads. The
+# connection pool covers every request plus UPLOAD_POOL, PART_POOL and
+# ACL_POOL (52 threads) so keep-alive connections aren't discarded under
+# load, and adaptive retries back off on S3 throttling
+BOTO_CFG = Config(
+    max_pool_connections=WORKER_CONNECTIONS + 52,
+    retries={'max_attempts': 10, 'mode': 'adaptive'},
+    tcp_keepalive=True
+)
+
+# Initialize S3 client. Credentials are resolved lazily on the first S3
+# call, so a missing configuration surfaces as NoCredentialsError there.
+# The session is kept so presigning can read the client's credentials
+session = boto3.Session()
+s3_client = session.client('s3', config=BOTO_CFG)
 
 # Get bucket name from environment variable
 BUCKET_NAME = os.environ.get('S3_BUCKET_NAME')
@@ -21,8 +108,24 @@ if not BUCKET_NAME:
     print("Error: S3_BUCKET_NAME environment variable is required.")
     exit(1)
 
-# Check if bucket supports ACLs
-def bucket_supports_acls():
+# Operators who know the bucket's ownership setting can skip discovery
+# entirely with S3_BUCKET_ACL_CAPABILITY=true|false
+BUCKET_ACL_CAPABILITY = os.environ.get('S3_BUCKET_ACL_CAPABILITY', '').strip().lower()
+if BUCKET_ACL_CAPABILITY not in ('', 'true', 'false'):
+    print("Error: S3_BUCKET_ACL_CAPABILITY must be 'true' or 'false'.")
+    exit(1)
+
+# Ownership controls are re-checked at most every ACL_CHECK_TTL seconds so
+# admin changes are picked up without an S3 call on every request
+ACL_CHECK_TTL = 300
+
+# Set once the role turns out to lack s3:GetBucketOwnershipControls, which
+# won't change at runtime, so the call isn't retried every TTL window
+_acl_check_denied = False
+
+@lru_cache(maxsize=1)
+def _bucket_supports_acls(ttl_bucket):
+    global _acl_check_denied
     try:
         response = s3_client.get_bucket_ownership_controls(Bucket=BUCKET_NAME)
         ownership_rules = response.get('OwnershipControls', {}).get('Rules', [])
@@ -30,11 +133,183 @@ def bucket_supports_acls():
             if rule.get('ObjectOwnership') == 'BucketOwnerEnforced':
                 return False
         return True
-    except ClientError:
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'AccessDenied':
+            _acl_check_denied = True
         # If we can't get ownership controls, assume ACLs are supported
         return True
 
-BUCKET_SUPPORTS_ACLS = bucket_supports_acls()
+# Check if bucket supports ACLs
+def bucket_supports_acls():
+    if BUCKET_ACL_CAPABILITY:
+        return BUCKET_ACL_CAPABILITY == 'true'
+    if _acl_check_denied:
+        return True
+    return _bucket_supports_acls(int(time.monotonic() // ACL_CHECK_TTL))
+
+# Upload request bodies are read and parsed in chunks of this size
+UPLOAD_READ_SIZE = 1024 * 1024
+# Finished files waiting for the rest of the request spill to disk above this
+UPLOAD_SPOOL_MEMORY = 512 * 1024
+
+# Shared pool for finishing the files of a multi-file request concurrently
+UPLOAD_POOL = ThreadPoolExecutor(max_workers=16)
+
+# Shared pool for fanning out batch ACL updates
+ACL_POOL = ThreadPoolExecutor(max_workers=20)
+MAX_ACL_BATCH = 1000
+
+# Files above one chunk are sent as explicit multipart uploads whose parts
+# go out concurrently on PART_POOL. MAX_PARTS_IN_FLIGHT caps the part bodies
+# one upload holds in memory and MAX_PARTS_IN_FLIGHT_TOTAL caps them across
+# the process (16 x 8MB = 128MB), on top of one chunk buffered per file
+MULTIPART_CHUNKSIZE = 8 * 1024 * 1024
+MAX_PARTS_IN_FLIGHT = 4
+MAX_PARTS_IN_FLIGHT_TOTAL = 16
+PART_POOL = ThreadPoolExecutor(max_workers=MAX_PARTS_IN_FLIGHT_TOTAL)
+_part_budget = threading.BoundedSemaphore(MAX_PARTS_IN_FLIGHT_TOTAL)
+
+class MultipartUploader:
+    """Upload one object as concurrent S3 UploadPart requests."""
+
+    def __init__(self, key, extra_args):
+        self.key = key
+        self.upload_id = s3_client.create_multipart_upload(
+            Bucket=BUCKET_NAME,
+            Key=key,
+            **extra_args
+        )['UploadId']
+        self._futures = []
+        self._slots = threading.BoundedSemaphore(MAX_PARTS_IN_FLIGHT)
+
+    def add_part(self, body):
+        # Blocks while this upload, or the process as a whole, has its
+        # maximum number of parts still uploading
+        self._slots.acquire()
+        _part_budget.acquire()
+        part_number = len(self._futures) + 1
+        future = PART_POOL.submit(self._upload_part, part_number, body)
+        future.add_done_callback(self._release)
+        self._futures.append(future)
+
+    def _release(self, future):
+        _part_budget.release()
+        self._slots.release()
+
+    def _upload_part(self, part_number, body):
+        response = s3_client.upload_part(
+            Bucket=BUCKET_NAME,
+            Key=self.key,
+            PartNumber=part_number,
+            UploadId=self.upload_id,
+            Body=body
+        )
+        return {'ETag': response['ETag'], 'PartNumber': part_number}
+
+    def complete(self):
+        parts = [future.result() for future in self._futures]
+        s3_client.complete_multipart_upload(
+            Bucket=BUCKET_NAME,
+            Key=self.key,
+            UploadId=self.upload_id,
+            MultipartUpload={'Parts': parts}
+        )
+
+    def abort(self):
+        # Let parts already in flight finish so none land after the abort
+        for future in self._futures:
+            future.cancel()
+        wait(self._futures)
+        s3_client.abort_multipart_upload(
+            Bucket=BUCKET_NAME,
+            Key=self.key,
+            UploadId=self.upload_id
+        )
+
+class S3UploadTarget:
+    """Stream one uploaded file to S3 as its bytes arrive.
+
+    Data is buffered up to one chunk; anything larger becomes a multipart
+    upload whose parts are sent while the rest of the request is read.
+    Nothing becomes visible in the bucket until finish(), so the upload
+    can still be dropped with abort() after the file's data has ended.
+    """
+
+    def __init__(self, key, extra_args):
+        self.key = key
+        self.extra_args = extra_args
+        self._buffer = bytearray()
+        self._upload = None
+        self._tail = None
+
+    def write(self, data):
+        self._buffer += data
+        while len(self._buffer) >= MULTIPART_CHUNKSIZE:
+            if self._upload is None:
+                self._upload = MultipartUploader(self.key, self.extra_args)
+            self._upload.add_part(bytes(self._buffer[:MULTIPART_CHUNKSIZE]))
+            del self._buffer[:MULTIPART_CHUNKSIZE]
+
+    def close(self):
+        # Park the unsent remainder (the whole file if it was small) in a
+        # spooled temp file until finish(), like Werkzeug's own spooling
+        self._tail = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_MEMORY)
+        self._tail.write(self._buffer)
+        self._tail.seek(0)
+        self._buffer = bytearray()
+
+    def finish(self):
+        try:
+            if self._upload is None:
+                s3_client.put_object(
+                    Bucket=BUCKET_NAME,
+                    Key=self.key,
+                    Body=self._tail,
+                    **self.extra_args
+                )
+                return
+            
+            try:
+                remainder = self._tail.read()
+                if remainder:
+                    self._upload.add_part(remainder)
+                self._upload.complete()
+            except Exception:
+                self._upload.abort()
+                raise
+        finally:
+            self._tail.close()
+
+    def abort(self):
+        if self._upload is not None:
+            self._upload.abort()
+        if self._tail is not None:
+            self._tail.close()
+
+# Download URLs stay valid for an hour but are only re-signed every 30
+# minutes. A presigned URL also dies with the credentials that signed it,
+# so the signing access key is part of the cache key: once botocore
+# refreshes temporary (e.g. instance role) credentials, about 15 minutes
+# before they expire, new URLs are signed. A cached URL therefore has at
+# least 30 minutes left with static credentials and at least ~15 minutes
+# with temporary ones.
+PRESIGN_EXPIRES = 3600
+PRESIGN_ROTATE = 1800
+
+@lru_cache(maxsize=4096)
+def _signed(key, epoch_bucket, access_key):
+    return s3_client.generate_presigned_url(
+        'get_object',
+        Params={'Bucket': BUCKET_NAME, 'Key': key},
+        ExpiresIn=PRESIGN_EXPIRES
+    )
+
+def presigned_download_url(key):
+    credentials = session.get_credentials()
+    if credentials is None:
+        raise NoCredentialsError()
+    access_key = credentials.get_frozen_credentials().access_key
+    return _signed(key, int(time.time() // PRESIGN_ROTATE), access_key)
 
 @app.route('/')
 def index():
@@ -42,180 +317,310 @@ def index():
 
 @app.route('/api/bucket-info')
 def bucket_info():
-    return jsonify({
+    return ojsonify({
         'success': True,
         'bucket_name': BUCKET_NAME,
-        'supports_acls': BUCKET_SUPPORTS_ACLS
+        'supports_acls': bucket_supports_acls()
     })
 
+def _is_resume_token(token):
+    try:
+        decoded = TokenDecoder().decode(token)
+    except (ValueError, TypeError):
+        return False
+    return isinstance(decoded, dict) and 'ContinuationToken' in decoded
+
 @app.route('/api/files')
 def list_files():
     prefix = request.args.get('prefix', '')
+    token = request.args.get('token')
+    max_keys = request.args.get('max_keys', type=int)
+    
+    if max_keys is not None and max_keys < 1:
+        return ojsonify({
+            'success': False,
+            'error': 'max_keys must be a positive integer'
+        }, 400)
+    
+    # Only accept tokens in the format next_token is returned in, so junk
+    # is rejected here rather than forwarded to S3 as a continuation token
+    if token is not None and not _is_resume_token(token):
+        return ojsonify({
+            'success': False,
+            'error': 'Invalid continuation token'
+        }, 400)
     
     try:
-        response = s3_client.list_objects_v2(
+        # Page through the listing so prefixes with more than 1000 keys
+        # aren't silently truncated; max_keys/token let clients fetch it
+        # incrementally instead of all at once
+        paginator = s3_client.get_paginator('list_objects_v2')
+        page_iter = paginator.paginate(
             Bucket=BUCKET_NAME,
             Prefix=prefix,
-            Delimiter='/'
+            Delimiter='/',
+            PaginationConfig={
+                'PageSize': 1000,
+                'MaxItems': max_keys,
+                'StartingToken': token
+            }
         )
         
-        files = []
-        folders = []
+        # Fetch the first page before streaming starts so bucket and
+        # permission errors still get a proper error response
+        pages = iter(page_iter)
+        first_page = next(pages)
         
-        # Process folders (common prefixes)
-        if 'CommonPrefixes' in response:
-            for prefix_info in response['CommonPrefixes']:
-                folder_name = prefix_info['Prefix'].rstrip('/').split('/')[-1]
-                folders.append({
-                    'name': folder_name,
-                    'type': 'folder',
-                    'path': prefix_info['Prefix']
-                })
+    except ClientError as e:
+        return client_error_response(e)
+    
+    def generate():
+        # Files are streamed as each page arrives; folders (one entry per
+        # common prefix) are few enough to collect and emit at the end
+        folders = []
+        first = True
+        dumps = orjson.dumps
+        sign = presigned_download_url
+        yield '{"files":['
         
-        # Process files
-        if 'Contents' in response:
-            for obj in response['Contents']:
-                # Skip the prefix itself if it's a folder
-                if obj['Key'].endswith('/'):
-                    continue
-                    
-                file_name = obj['Key'].split('/')[-1]
-                if file_name:  # Skip empty names
-                    files.append({
+        try:
+            for page in itertools.chain((first_page,), pages):
+                # Process folders (common prefixes)
+                for prefix_info in page.get('CommonPrefixes') or []:
+                    folder_name = prefix_info['Prefix'].rstrip('/').split('/')[-1]
+                    folders.append({
+                        'name': folder_name,
+                        'type': 'folder',
+                        'path': prefix_info['Prefix']
+                    })
+                
+                # Process files, joining each page into a single chunk.
+                # This loop runs once per object, so lookups are bound locally
+                entries = []
+                entries_append = entries.append
+                for obj in page.get('Contents') or []:
+                    key = obj['Key']
+                    file_name = key.rsplit('/', 1)[-1]
+                    if not file_name:  # Skip folder placeholders ("dir/")
+                        continue
+                    entries_append(dumps({
                         'name': file_name,
                         'type': 'file',
-                        'path': obj['Key'],
+                        'path': key,
                         'size': obj['Size'],
-                        'last_modified': obj['LastModified'].isoformat(),
-                        'download_url': f"/api/download?key={obj['Key']}"
-                    })
-        
-        return jsonify({
-            'success': True,
-            'files': files,
-            'folders': folders,
-            'current_prefix': prefix
-        })
+                        'last_modified': obj['LastModified'],
+                        'download_url': sign(key)
+                    }))
+                
+                if entries:
+                    chunk = b','.join(entries)
+                    yield chunk if first else b',' + chunk
+                    first = False
+            
+            status = {'success': True, 'next_token': page_iter.resume_token}
+        except ClientError as e:
+            # Headers are already sent, so report failures in the body
+            status = {'success': False, 'error': _client_err(e)}
         
+        yield b'],"folders":' + orjson.dumps(folders)
+        yield b',"current_prefix":' + orjson.dumps(prefix)
+        for name, value in status.items():
+            yield b',"' + name.encode() + b'":' + orjson.dumps(value)
+        yield '}'
+    
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+def _abort_uploads(targets):
+    for target in targets:
+        try:
+            target.abort()
+        except Exception:
+            # Best effort; S3 lifecycle rules can clean up leftover parts
+            pass
+
+def _finish_upload(target, filename, original_name):
+    try:
+        target.finish()
+        return {
+            'filename': filename,
+            'key': target.key,
+            'success': True
+        }, None
     except ClientError as e:
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
+        return None, f'Failed to upload {original_name}: {_client_err(e)["message"]}'
+    except Exception as e:
+        return None, f'Error processing {original_name}: {str(e)}'
 
 @app.route('/api/upload', methods=['POST'])
 def upload_file():
-    files = request.files.getlist('files')
-    if not files or len(files) == 0:
-        # Try single file parameter for backward compatibility
-        single_file = request.files.get('file')
-        if single_file:
-            files = [single_file]
-        else:
-            return jsonify({'success': False, 'error': 'No files provided'}), 400
-    
-    prefix = request.form.get('prefix', '')
-    acl = request.form.get('acl', 'private')
-    
-    # Validate ACL value
-    valid_acls = ['private', 'public-read', 'public-read-write', 'authenticated-read']
-    if acl not in valid_acls:
-        return jsonify({
-            'success': False,
-            'error': f'Invalid ACL value: {acl}. Must be one of: {", ".join(valid_acls)}'
-        }), 400
+    mimetype, options = parse_options_header(request.headers.get('Content-Type', ''))
+    boundary = options.get('boundary', '').encode('latin-1')
+    if mimetype != 'multipart/form-data' or not boundary:
+        return ojsonify({'success': False, 'error': 'No files provided'}, 400)
     
-    # Check if bucket supports ACLs for non-private settings
-    if not BUCKET_SUPPORTS_ACLS and acl != 'private':
-        return jsonify({
-            'success': False,
-            'error': f'Bucket does not support ACLs (BucketOwnerEnforced). Only private uploads are allowed.'
-        }), 400
-    
-    # Filter out empty files
-    valid_files = [f for f in files if f.filename != '']
-    if not valid_files:
-        return jsonify({'success': False, 'error': 'No valid files selected'}), 400
+    # The body is parsed as it arrives rather than spooled by Werkzeug, so
+    # each file streams to S3 while later ones are still being received.
+    # This means the prefix and acl fields must come before the files.
+    # Files are only committed (put/complete) once the whole body has been
+    # read, so a late field can still reject the request without leaving
+    # objects under the wrong key.
+    decoder = MultipartDecoder(boundary, max_parts=request.max_form_parts)
+    form = {'prefix': '', 'acl': 'private'}
+    upload_args = None
     
     results = []
     errors = []
+    pending = []
+    files_seen = 0
     
-    for file in valid_files:
-        try:
-            filename = secure_filename(file.filename)
-            if not filename:  # Skip if filename becomes empty after sanitization
-                errors.append(f'Invalid filename: {file.filename}')
-                continue
-                
-            s3_key = f"{prefix}{filename}" if prefix else filename
-            
-            # Prepare upload arguments
-            upload_args = {'ServerSideEncryption': 'AES256'}
-            
-            # Only add ACL if not using default private setting
-            # Some buckets have ACLs disabled (BucketOwnerEnforced)
-            if acl != 'private':
-                upload_args['ACL'] = acl
-            
-            s3_client.upload_fileobj(
-                file,
-                BUCKET_NAME,
-                s3_key,
-                ExtraArgs=upload_args
-            )
+    part = None
+    field_data = []
+    target = None
+    
+    try:
+        while True:
+            chunk = request.stream.read(UPLOAD_READ_SIZE)
+            decoder.receive_data(chunk or None)
+            event = decoder.next_event()
             
-            results.append({
-                'filename': filename,
-                'key': s3_key,
-                'success': True
-            })
+            while not isinstance(event, (Epilogue, NeedData)):
+                if isinstance(event, Field):
+                    part = event
+                    field_data = []
+                
+                elif isinstance(event, File):
+                    part = event
+                    target = None
+                    
+                    # Accept the single 'file' field for backward compatibility
+                    if event.name in ('files', 'file'):
+                        files_seen += 1
+                        
+                        if upload_args is None:
+                            prefix = form['prefix']
+                            acl = form['acl']
+                            
+                            # Validate ACL value
+                            if not is_valid_acl(acl):
+                                return ojsonify({
+                                    'success': False,
+                                    'error': f'Invalid ACL value: {acl}. Must be one of: {", ".join(ACL_CHOICES)}'
+                                }, 400)
+                            
+                            # Check if bucket supports ACLs for non-private settings
+                            if acl != 'private' and not bucket_supports_acls():
+                                return ojsonify({
+                                    'success': False,
+                                    'error': f'Bucket does not support ACLs (BucketOwnerEnforced). Only private uploads are allowed.'
+                                }, 400)
+                            
+                            upload_args = UPLOAD_ARGS[acl]
+                        
+                        raw_name = event.filename
+                        if raw_name:
+                            filename = secure_filename(raw_name)
+                            if filename:
+                                target = S3UploadTarget(prefix + filename, upload_args)
+                            else:  # Name became empty after sanitization
+                                errors.append(f'Invalid filename: {raw_name}')
+                
+                elif isinstance(event, Data):
+                    if isinstance(part, Field):
+                        field_data.append(event.data)
+                        if not event.more_data and part.name in form:
+                            if files_seen:
+                                _abort_uploads([t for t, _, _ in pending] + ([target] if target else []))
+                                return ojsonify({
+                                    'success': False,
+                                    'error': f'Form field "{part.name}" must be sent before the files'
+                                }, 400)
+                            form[part.name] = b''.join(field_data).decode('utf-8', 'replace')
+                    
+                    elif target is not None:
+                        try:
+                            target.write(event.data)
+                        except ClientError as e:
+                            errors.append(f'Failed to upload {raw_name}: {_client_err(e)["message"]}')
+                            _abort_uploads([target])
+                            target = None
+                        except BotoCoreError as e:
+                            # Connection errors fail this file only, as in _finish_upload
+                            errors.append(f'Error processing {raw_name}: {str(e)}')
+                            _abort_uploads([target])
+                            target = None
+                        
+                        if target is not None and not event.more_data:
+                            target.close()
+                            pending.append((target, filename, raw_name))
+                            target = None
+                
+                event = decoder.next_event()
             
-        except ClientError as e:
-            errors.append(f'Failed to upload {file.filename}: {str(e)}')
-        except Exception as e:
-            errors.append(f'Error processing {file.filename}: {str(e)}')
+            if isinstance(event, Epilogue) or not chunk:
+                break
+    except ValueError:
+        # Raised by the decoder for a truncated or malformed body
+        _abort_uploads([t for t, _, _ in pending] + ([target] if target else []))
+        return ojsonify({'success': False, 'error': 'Malformed upload request'}, 400)
+    except Exception:
+        # Client disconnects and oversized bodies abort every upload so far
+        _abort_uploads([t for t, _, _ in pending] + ([target] if target else []))
+        raise
+    
+    if not files_seen:
+        return ojsonify({'success': False, 'error': 'No files provided'}, 400)
+    
+    if not pending and not errors:
+        return ojsonify({'success': False, 'error': 'No valid files selected'}, 400)
+    
+    futures = [UPLOAD_POOL.submit(_finish_upload, *item) for item in pending]
+    for future in as_completed(futures):
+        result, error = future.result()
+        if result:
+            results.append(result)
+        if error:
+            errors.append(error)
     
     # Determine response based on results
     if results and not errors:
-        return jsonify({
+        return ojsonify({
             'success': True,
             'message': f'Successfully uploaded {len(results)} file(s)',
             'uploaded_files': results
         })
     elif results and errors:
-        return jsonify({
+        return ojsonify({
             'success': True,
             'message': f'Uploaded {len(results)} file(s) with {len(errors)} error(s)',
             'uploaded_files': results,
             'errors': errors
-        }), 207  # Multi-status
+        }, 207)  # Multi-status
     else:
-        return jsonify({
+        return ojsonify({
             'success': False,
             'error': 'Failed to upload any files',
             'errors': errors
-        }), 500
+        }, 500)
 
 @app.route('/api/acl', methods=['POST'])
 def update_acl():
-    data = request.get_json()
+    data = parse_json()
     
     if not data or 'key' not in data or 'acl' not in data:
-        return jsonify({
+        return ojsonify({
             'success': False,
             'error': 'Missing required fields: key and acl'
-        }), 400
+        }, 400)
     
     s3_key = data['key']
     acl = data['acl']
     
     # Validate ACL value
-    valid_acls = ['private', 'public-read', 'public-read-write', 'authenticated-read']
-    if acl not in valid_acls:
-        return jsonify({
+    if not is_valid_acl(acl):
+        return ojsonify({
             'success': False,
-            'error': f'Invalid ACL. Must be one of: {", ".join(valid_acls)}'
-        }), 400
+            'error': f'Invalid ACL. Must be one of: {", ".join(ACL_CHOICES)}'
+        }, 400)
     
     try:
         s3_client.put_object_acl(
@@ -224,64 +629,133 @@ def update_acl():
             ACL=acl
         )
         
-        return jsonify({
+        return ojsonify({
             'success': True,
             'message': f'ACL updated to {acl} for {s3_key}'
         })
         
     except ClientError as e:
-        return jsonify({
+        return client_error_response(e)
+
+def _one_acl(key, acl):
+    try:
+        s3_client.put_object_acl(
+            Bucket=BUCKET_NAME,
+            Key=key,
+            ACL=acl
+        )
+        return {'key': key, 'acl': acl, 'success': True}
+    except ClientError as e:
+        return {'key': key, 'success': False, 'error': _client_err(e)}
+    except BotoCoreError as e:
+        return {'key': key, 'success': False, 'error': {'code': type(e).__name__, 'message': str(e)}}
+
+@app.route('/api/acl/batch', methods=['POST'])
+def update_acl_batch():
+    data = parse_json()
+    items = data.get('items') if data else None
+    
+    if not items or not isinstance(items, list):
+        return ojsonify({
+            'success': False,
+            'error': 'Missing required field: items'
+        }, 400)
+    
+    if len(items) > MAX_ACL_BATCH:
+        return ojsonify({
             'success': False,
-            'error': str(e)
-        }), 500
+            'error': f'Too many items. Maximum is {MAX_ACL_BATCH} per request.'
+        }, 400)
+    
+    # Validate every item before touching S3 so a bad entry fails the whole batch
+    for item in items:
+        if not isinstance(item, dict) or 'key' not in item or 'acl' not in item:
+            return ojsonify({
+                'success': False,
+                'error': 'Each item requires fields: key and acl'
+            }, 400)
+        if not isinstance(item['key'], str) or not item['key']:
+            return ojsonify({
+                'success': False,
+                'error': 'Each item key must be a non-empty string'
+            }, 400)
+        if not is_valid_acl(item['acl']):
+            return ojsonify({
+                'success': False,
+                'error': f'Invalid ACL for {item["key"]}. Must be one of: {", ".join(ACL_CHOICES)}'
+            }, 400)
+    
+    results = list(ACL_POOL.map(lambda item: _one_acl(item['key'], item['acl']), items))
+    updated = sum(1 for result in results if result['success'])
+    
+    # Determine response based on results
+    if updated == len(results):
+        return ojsonify({
+            'success': True,
+            'message': f'ACL updated for {updated} file(s)',
+            'results': results
+        })
+    elif updated:
+        return ojsonify({
+            'success': True,
+            'message': f'ACL updated for {updated} file(s) with {len(results) - updated} error(s)',
+            'results': results
+        }, 207)  # Multi-status
+    else:
+        return ojsonify({
+            'success': False,
+            'error': 'Failed to update ACL for any files',
+            'results': results
+        }, 500)
 
 @app.route('/api/create-directory', methods=['POST'])
 def create_directory():
-    data = request.get_json()
+    data = parse_json()
     
     if not data or 'name' not in data:
-        return jsonify({
+        return ojsonify({
             'success': False,
             'error': 'Missing required field: name'
-        }), 400
+        }, 400)
     
     directory_name = data['name'].strip()
     prefix = data.get('prefix', '')
     
     # Validate directory name
     if not directory_name:
-        return jsonify({
+        return ojsonify({
             'success': False,
             'error': 'Directory name cannot be empty'
-        }), 400
+        }, 400)
     
     # Remove any slashes from the directory name and add trailing slash
     directory_name = directory_name.strip('/').replace('/', '-')
     
     # Validate directory name characters
-    import re
-    if not re.match(r'^[a-zA-Z0-9\-_.]+$', directory_name):
-        return jsonify({
+    if not _DIR_NAME_RE.match(directory_name):
+        return ojsonify({
             'success': False,
             'error': 'Directory name can only contain letters, numbers, hyphens, underscores, and periods'
-        }), 400
+        }, 400)
     
     # Create the full directory path
     directory_key = f"{prefix}{directory_name}/"
     
     try:
-        # Check if directory already exists
-        response = s3_client.list_objects_v2(
-            Bucket=BUCKET_NAME,
-            Prefix=directory_key,
-            MaxKeys=1
-        )
+        # Check if directory already exists (a single HEAD on the placeholder)
+        try:
+            s3_client.head_object(Bucket=BUCKET_NAME, Key=directory_key)
+            exists = True
+        except ClientError as e:
+            if e.response['Error']['Code'] not in ('404', 'NoSuchKey'):
+                raise
+            exists = False
         
-        if 'Contents' in response and len(response['Contents']) > 0:
-            return jsonify({
+        if exists:
+            return ojsonify({
                 'success': False,
                 'error': f'Directory "{directory_name}" already exists'
-            }), 409
+            }, 409)
         
         # Create directory by uploading empty object with trailing slash
         s3_client.put_object(
@@ -291,50 +765,48 @@ def create_directory():
             ServerSideEncryption='AES256'
         )
         
-        return jsonify({
+        return ojsonify({
             'success': True,
             'message': f'Directory "{directory_name}" created successfully',
             'directory_key': directory_key
         })
         
     except ClientError as e:
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
+        return client_error_response(e)
 
 @app.route('/api/download')
 def download_file():
     key = request.args.get('key')
     
     if not key:
-        return jsonify({'error': 'Missing key parameter'}), 400
+        return ojsonify({'error': 'Missing key parameter'}, 400)
     
     try:
         # Generate a presigned URL for download
-        download_url = s3_client.generate_presigned_url(
-            'get_object',
-            Params={'Bucket': BUCKET_NAME, 'Key': key},
-            ExpiresIn=3600  # URL expires in 1 hour
-        )
+        download_url = presigned_download_url(key)
         
-        return jsonify({
+        return ojsonify({
             'success': True,
             'download_url': download_url
         })
         
     except ClientError as e:
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
+        return client_error_response(e)
 
 @app.errorhandler(413)
 def request_entity_too_large(error):
-    return jsonify({
+    return ojsonify({
         'success': False,
         'error': 'File too large. Maximum size is 100MB.'
-    }), 413
+    }, 413)
+
+@app.errorhandler(NoCredentialsError)
+def no_credentials(error):
+    return ojsonify({
+        'success': False,
+        'error': 'AWS credentials not found. Please configure AWS credentials via environment variables or IAM role.'
+    }, 500)
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    # Development server only; production runs under gunicorn (gunicorn.conf.py)
+    app.run(debug=os.environ.get('FLASK_DEBUG') == '1', host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,20 @@
+# Gunicorn configuration for the AWS S3 Internal Browser
+#
+# Every endpoint spends its time waiting on S3, so gevent workers let each
+# process multiplex many in-flight requests cooperatively.
+
+import multiprocessing
+import os
+
+bind = '0.0.0.0:5000'
+workers = multiprocessing.cpu_count() * 2 + 1
+worker_class = 'gevent'
+# app.py sizes its S3 connection pool from the same variable, so each
+# in-flight request can keep its own connection alive
+worker_connections = int(os.environ.get('WORKER_CONNECTIONS', '200'))
+timeout = 120
+
+# The gevent worker runs monkey.patch_all() before importing the app, which
+# makes botocore's urllib3 sockets cooperative. Preloading would import
+# boto3 (and ssl) in the master before that patch, so it stays off.
+preload_app = False
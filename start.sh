@@ -139,7 +139,7 @@ tmux new-session -d -s "$SESSION_NAME" -c "$APP_DIR" \
      echo 'Press Ctrl+C to stop the application' && \
      echo 'Use: tmux attach-session -t $SESSION_NAME to view logs' && \
      echo '' && \
-     gunicorn --bind 0.0.0.0:5000 --workers 4 --timeout 120 app:app"
+     gunicorn --config gunicorn.conf.py app:app"
 
 if [ $? -eq 0 ]; then
     echo "✅ Application started successfully!"